@@ -26,7 +26,11 @@ Automatically change AWAY status when WeeChat's screen is detached or a relay cl
 
 Settings: plugins.var.python.autoaway.*
     message     -> away message used for setting /AWAY
-    interval    -> how often to check if the screen is detached/if there are any relays connected
+    interval    -> how often to check if the screen is detached/if there are any relays connected.
+                   while nothing changes (screen attached state, connected servers and relays) and
+                   no away status is set or cleared, the interval is doubled after each check, up
+                   to 60 seconds, and reset as soon as something does. there is no backoff when
+                   WeeChat is not running in screen.
 
 Python 3.6 or later required.
 """
@@ -41,6 +45,7 @@ except ImportError:
 
 import os
 import re
+import subprocess
 from typing import Any, Dict, Generator, Match, Set, Tuple  # pylint: disable=unused-import
 
 SCRIPT_NAME = "autoaway"
@@ -61,9 +66,11 @@ DEFAULT_SETTINGS = {
 SCREEN_SOCKET = ""
 AWAY_SERVERS = set()  # type: Set[str]
 TIMER_HOOK = None
-RELAY_REGEX = re.compile(r"^[0-9]+\/"
-                         r"(?:ipv4\.)?(?:ipv6\.)?(?:ssl\.)?"
-                         r"(?P<protocol>irc|weechat)\.?(?P<name>[^ ]+)?\/.+$")
+TIMER_INTERVAL = 0
+MAX_TIMER_INTERVAL = 60
+LAST_STATE = None  # type: Any
+RELAY_DESC_PREFIXES = ("ipv4.", "ipv6.", "ssl.")
+SCREEN_LS_REGEX = re.compile(r"Sockets? in (/.+)\.")
 
 
 def config_get(name: str) -> str:
@@ -90,8 +97,13 @@ def get_screen_socket() -> None:
 
     sty = os.environ.get("STY", None)
     if sty:
-        match = re.search(r"Sockets? in (/.+)\.",
-                          os.popen("env LC_ALL=C screen -ls").read())
+        try:
+            output = subprocess.run(["screen", "-ls"], env={**os.environ, "LC_ALL": "C"},
+                                    stdout=subprocess.PIPE, universal_newlines=True).stdout
+        except OSError:
+            return
+
+        match = SCREEN_LS_REGEX.search(output)
         if match:
             SCREEN_SOCKET = os.path.join(match.group(1), sty)
 
@@ -120,69 +132,132 @@ def clear_away(server="") -> None:
                            f"{server};;priority_low;;/away")
         AWAY_SERVERS.remove(server)
     else:
+        signal_send = w.hook_signal_send
+        signal_string = w.WEECHAT_HOOK_SIGNAL_STRING
         for name in AWAY_SERVERS:
-            w.hook_signal_send("irc_input_send", w.WEECHAT_HOOK_SIGNAL_STRING,
-                               f"{name};;priority_low;;/away")
+            signal_send("irc_input_send", signal_string, name + ";;priority_low;;/away")
         AWAY_SERVERS.clear()
 
 
+def parse_relay_protocol(proto: str) -> Dict[str, Any]:
+    """ parse a relay protocol string in the form "[ipv4.][ipv6.][ssl.]<protocol>[.<name>]".
+    returns an empty dict if it isn't an irc or weechat relay. """
+    for prefix in RELAY_DESC_PREFIXES:
+        if proto.startswith(prefix):
+            proto = proto[len(prefix):]
+
+    protocol, _, name = proto.partition(".")
+    if protocol not in ("irc", "weechat"):
+        return {}
+
+    return {"protocol": protocol, "name": name or None}
+
+
+def parse_relay_desc(desc: str) -> Dict[str, Any]:
+    """ parse the protocol and server name out of a relay client's description, in the form
+    "<id>/<protocol string>/<address>". returns an empty dict if it isn't an irc or weechat
+    relay. """
+    try:
+        client_id, proto, address = desc.split("/", 2)
+    except ValueError:
+        return {}
+
+    if not client_id.isdigit() or not address:
+        return {}
+
+    return parse_relay_protocol(proto)
+
+
+def relay_client_info(infolist: str) -> Dict[str, Any]:
+    """ protocol and server name of the relay client at the current infolist item. uses the
+    client's "protocol_string" field, falling back to parsing "desc" on WeeChat versions without
+    it. """
+    proto = w.infolist_string(infolist, "protocol_string")
+    if proto:
+        return parse_relay_protocol(proto)
+
+    return parse_relay_desc(w.infolist_string(infolist, "desc"))
+
+
 def relay_get_server(relay_ptr: str) -> Dict:
     """ get the server name for a relay client pointer """
     infolist = w.infolist_get("relay", relay_ptr, "")
     server = {}  # type: Dict[str, str]
-    if infolist and w.infolist_next(infolist):
-        match = RELAY_REGEX.search(w.infolist_string(infolist, "desc"))
-        if match:
-            server = match.groupdict()
+    if infolist:
+        if w.infolist_next(infolist):
+            server = relay_client_info(infolist)
 
         w.infolist_free(infolist)
     return server
 
 
-def relays_connected(server: str) -> bool:
-    """ true if there are any relays connected to 'server' """
+def snapshot_relays() -> Tuple[bool, Set[str]]:
+    """ walk the relay list once and return whether a weechat protocol relay is connected, and the
+    set of server names that have an irc protocol relay connected """
+    has_weechat = False
+    irc_servers = set()  # type: Set[str]
+
+    infolist_next = w.infolist_next
+
     infolist = w.infolist_get("relay", '', '')
-    found = False
     if infolist:
-        while w.infolist_next(infolist):
-
-            if found:
+        while infolist_next(infolist):
+            relay = relay_client_info(infolist)
+            if relay.get("protocol") == "weechat":
+                # weechat protocol is treated as connected to ALL servers
+                has_weechat = True
                 break
-
-            match = RELAY_REGEX.search(w.infolist_string(infolist, "desc"))
-            if match:
-                if match.group("protocol") == "weechat":
-                    # weechat protocol is treated as connected to ALL servers
-                    found = True
-                    break
-                elif match.group("protocol") == "irc" and match.group("name") == server:
-                    found = True
+            elif relay.get("protocol") == "irc":
+                irc_servers.add(relay["name"])
 
         w.infolist_free(infolist)
 
-    return found
+    return has_weechat, irc_servers
 
 
-def set_timer() -> None:
-    """ set timer hook """
-    global TIMER_HOOK
+def set_timer(interval: int = 0) -> None:
+    """ set timer hook, firing every 'interval' seconds or the configured interval if not given """
+    global TIMER_HOOK, TIMER_INTERVAL
 
     if TIMER_HOOK:
         w.unhook(TIMER_HOOK)
 
-    TIMER_HOOK = w.hook_timer(config_get_int(
-        "interval") * 1000, 0, 0, "screen_check_timer_cb", "")
+    TIMER_INTERVAL = interval or config_get_int("interval")
+    TIMER_HOOK = w.hook_timer(TIMER_INTERVAL * 1000, 0, 0, "screen_check_timer_cb", "")
+
+
+def backoff_timer(state: Any, acted: bool) -> None:
+    """ double the timer interval (up to MAX_TIMER_INTERVAL) each time 'state' is unchanged since the
+    last check and nothing was done, and go back to the configured interval otherwise """
+    global LAST_STATE
+
+    if not SCREEN_SOCKET:
+        # nothing to detect without screen, keep following the configured interval
+        return
+
+    if state == LAST_STATE and not acted:
+        interval = min(TIMER_INTERVAL * 2, MAX_TIMER_INTERVAL)
+        if interval > TIMER_INTERVAL:
+            set_timer(interval)
+    elif LAST_STATE is not None and TIMER_INTERVAL != config_get_int("interval"):
+        set_timer()
+
+    LAST_STATE = state
 
 
 def get_connected_servers() -> Generator[str, None, None]:
     """ return a list of connected servers that are not AWAY """
+    infolist_next = w.infolist_next
+    infolist_string = w.infolist_string
+    infolist_integer = w.infolist_integer
+
     infolist = w.infolist_get("irc_server", "", "")
     if infolist:
-        while w.infolist_next(infolist):
-            if (w.infolist_integer(infolist, "is_connected")
-                    and not w.infolist_integer(infolist, "is_away")):
+        while infolist_next(infolist):
+            if (infolist_integer(infolist, "is_connected")
+                    and not infolist_integer(infolist, "is_away")):
 
-                yield w.infolist_string(infolist, "name")
+                yield infolist_string(infolist, "name")
         w.infolist_free(infolist)
 
 
@@ -199,13 +274,31 @@ def screen_check_timer_cb(data: str, remaining: int) -> int:
     """ called each timer timeout to check if WeeChat's screen is attached, and if there are any
     relay clients connected to a server. """
     if is_screen_attached():
+        acted = bool(AWAY_SERVERS)
         clear_away()
+        backoff_timer(True, acted)
+        return w.WEECHAT_RC_OK
+
+    servers = list(get_connected_servers())
+    if not servers:
+        # everything is already away (or disconnected), no need to look at the relays
+        backoff_timer((False, frozenset()), False)
+        return w.WEECHAT_RC_OK
+
+    has_weechat, relay_servers = snapshot_relays()
+    state = (False, frozenset(servers), has_weechat, frozenset(relay_servers))
+    if has_weechat:
+        backoff_timer(state, False)
         return w.WEECHAT_RC_OK
 
-    for server in get_connected_servers():
-        if not relays_connected(server):
-            set_away(server, config_get("message"))
+    acted = False
+    message = config_get("message")
+    for server in servers:
+        if server not in relay_servers:
+            set_away(server, message)
+            acted = True
 
+    backoff_timer(state, acted)
     return w.WEECHAT_RC_OK
 
 
@@ -43,15 +43,17 @@ for example:
 Thanks to Aaron Jones for beta testing this script and giving me the idea to write it!
 """
 
+import sys
+
 try:
     import weechat as w
 except ImportError:
-    import sys
     print("Load this script from WeeChat.")
     sys.exit()
 
+import time
 from collections import defaultdict
-from datetime import datetime
+from functools import lru_cache
 
 try:
     from typing import Dict, Set, Tuple  # pylint: disable=unused-import
@@ -73,16 +75,18 @@ DEFAULT_SETTINGS = {
     "color_away": ("default", "color used for away/gone duration in printed away messages")
 }
 
-KNOWN_AWAY = defaultdict(dict)  # type: Dict[str, Dict[str, Tuple[datetime, str]]]
-CACHE = defaultdict(dict)  # type: Dict[str, Dict[str, Set]]
-BUFFERS = {}  # type: Dict[str, str]
+KNOWN_AWAY = {}  # type: Dict[Tuple[str, str], Tuple[float, str]]
+CACHE = {}  # type: Dict[Tuple[str, str], Set[str]]
+SERVER_NICKS = defaultdict(set)  # type: Dict[str, Set[str]]
+CHAN_TO_NICKS = defaultdict(set)  # type: Dict[Tuple[str, str], Set[str]]
+BUFFERS = defaultdict(dict)  # type: Dict[str, Dict[str, str]]
+PTR_TO_KEY = {}  # type: Dict[str, Tuple[str, str]]
 TAGS = "irc_away,nick_{nick},no_highlight,notify_none,away_info,irc_smart_filter"
+SELF_NICK = {}  # type: Dict[str, str]
+COLOR_CACHE = {}  # type: Dict[str, str]
+SWEPT = set()  # type: Set[str]
+RENDERED = {}  # type: Dict[str, str]
 
-MSG_BACK_NO_DURATION = "{cc_pfx}{pfx}\t{cc}{nick}{default} has returned"
-MSG_BACK_DURATION = "{cc_pfx}{pfx}\t{cc}{nick}{default} has returned {sep}({cc_away}gone" \
-                    " {duration}{sep})"
-MSG_AWAY = "{cc_pfx}{pfx}\t{cc}{nick}{default} is now away {sep}({cc_away}{awaymsg}{sep})"
-MSG_STILL_AWAY = "{cc_pfx}{pfx}\t{cc}{nick}{default} is still away {sep}({cc_away}{awaymsg}{sep})"
 
 def config_get(name: str):
     """ retrieve value of a setting """
@@ -97,77 +101,220 @@ def config_set_defaults():
             w.config_set_desc_plugin(option, desc)
 
 
-def get_buffer(server, chan):
-    """ return cached pointer to buffer for server.channel """
-    return BUFFERS[server + "." + chan]
+def render_settings():
+    """ pre-render the prefix and colors used in every away message. called again whenever one of
+    the settings they depend on changes """
+    RENDERED["pfx"] = config_get("print_prefix")
+    RENDERED["cc_pfx"] = w.color(config_get("color_prefix"))
+    RENDERED["cc_away"] = w.color(config_get("color_away"))
+    RENDERED["sep"] = w.color("weechat.color.chat_delimiters")
+    RENDERED["default"] = w.color("default")
 
 
-def color_nick(nick):
-    """ colorize a nickname based on what WeeChat picked as it's color. """
-    return w.color(w.info_get("nick_color_name", nick))
+def msg_back_no_duration(cc, nick):
+    """ message for a nick returning from an away we didn't see start """
+    return "%s%s\t%s%s%s has returned" % (RENDERED["cc_pfx"], RENDERED["pfx"], cc, nick,
+                                          RENDERED["default"])
 
 
-def propagate_common_msg(server, common_nick, message):
-    """ propagate a message to all irc buffers in common with a nick on a server """
+def msg_back_duration(cc, nick, duration):
+    """ message for a nick returning after being away for 'duration' """
+    return "%s%s\t%s%s%s has returned %s(%sgone %s%s)" % (
+        RENDERED["cc_pfx"], RENDERED["pfx"], cc, nick, RENDERED["default"], RENDERED["sep"],
+        RENDERED["cc_away"], duration, RENDERED["sep"])
+
+
+def msg_away(cc, nick, awaymsg):
+    """ message for a nick going away """
+    return "%s%s\t%s%s%s is now away %s(%s%s%s)" % (
+        RENDERED["cc_pfx"], RENDERED["pfx"], cc, nick, RENDERED["default"], RENDERED["sep"],
+        RENDERED["cc_away"], awaymsg, RENDERED["sep"])
+
+
+def msg_still_away(cc, nick, awaymsg):
+    """ message for an away nick changing its away reason """
+    return "%s%s\t%s%s%s is still away %s(%s%s%s)" % (
+        RENDERED["cc_pfx"], RENDERED["pfx"], cc, nick, RENDERED["default"], RENDERED["sep"],
+        RENDERED["cc_away"], awaymsg, RENDERED["sep"])
+
 
-    found_channel = False
-    found_query = False
-    tags = TAGS.format(nick=common_nick)
+@lru_cache(maxsize=4096)
+def nick_tags(nick):
+    """ tags for away message lines about 'nick' """
+    return TAGS.format(nick=nick)
 
-    if common_nick in CACHE[server]:
-        found_channel = True
-        for chan in CACHE[server][common_nick]:
-            w.prnt_date_tags(get_buffer(server, chan), 0, tags, message)
 
+def set_buffer(server, chan, ptr):
+    """ cache pointer to buffer for (server, channel), keeping the reverse index in sync """
+    server, chan = sys.intern(server), sys.intern(chan)
+    old = BUFFERS[server].get(chan)
+    if old is not None and old != ptr:
+        PTR_TO_KEY.pop(old, None)
 
-    if server + "." + common_nick in BUFFERS:
-        found_query = True
-        w.prnt_date_tags(get_buffer(server, common_nick), 0, tags, message)
+    BUFFERS[server][chan] = ptr
+    PTR_TO_KEY[ptr] = (server, chan)
 
-    if found_channel and found_query:
+
+def forget_buffer(server, chan):
+    """ drop the cached pointer to buffer for (server, channel), if any """
+    ptr = BUFFERS[server].pop(chan, None)
+    if ptr is not None:
+        PTR_TO_KEY.pop(ptr, None)
+
+
+def cache_nick(server, nick, chan):
+    """ remember that 'nick' is on 'chan' on a server """
+    server, nick, chan = sys.intern(server), sys.intern(nick), sys.intern(chan)
+    chans = CACHE.get((server, nick))
+    if chans is None:
+        chans = CACHE[(server, nick)] = set()
+        SERVER_NICKS[server].add(nick)
+
+    chans.add(chan)
+    CHAN_TO_NICKS[(server, chan)].add(nick)
+
+
+def uncache_nick(server, nick):
+    """ forget which channels 'nick' is known to be on for a server """
+    chans = CACHE.pop((server, nick), None)
+    if chans is None:
         return
 
-    chans_il = w.infolist_get("irc_channel", "", server)
-    if not chans_il:
+    SERVER_NICKS[server].discard(nick)
+    for chan in chans:
+        nicks = CHAN_TO_NICKS.get((server, chan))
+        if nicks is not None:
+            nicks.discard(nick)
+
+
+def rename_cached_nick(server, oldnick, newnick):
+    """ move the cached channels of 'oldnick' over to 'newnick' on a server """
+    chans = CACHE.pop((server, oldnick), None)
+    if chans is None:
         return
 
-    channels = {}
+    newnick = sys.intern(newnick)
+    CACHE[(server, newnick)] = chans
+    SERVER_NICKS[server].discard(oldnick)
+    SERVER_NICKS[server].add(newnick)
+    for chan in chans:
+        nicks = CHAN_TO_NICKS[(server, chan)]
+        nicks.discard(oldnick)
+        nicks.add(newnick)
+
 
-    while w.infolist_next(chans_il):
-        ptr = w.infolist_pointer(chans_il, "buffer")
-        name = w.infolist_string(chans_il, "name")
+def uncache_nick_channel(server, nick, chan):
+    """ forget that 'nick' is on 'chan' on a server """
+    chans = CACHE.get((server, nick))
+    if chans is not None:
+        chans.discard(chan)
 
-        channels[name] = ptr
+    nicks = CHAN_TO_NICKS.get((server, chan))
+    if nicks is not None:
+        nicks.discard(nick)
 
-    w.infolist_free(chans_il)
 
-    for chan, ptr in channels.items():
+def uncache_channel(server, chan):
+    """ forget every nick known to be on 'chan' on a server """
+    for nick in CHAN_TO_NICKS.pop((server, chan), ()):
+        chans = CACHE.get((server, nick))
+        if chans is not None:
+            chans.discard(chan)
 
-        BUFFERS["{}.{}".format(server, chan)] = ptr
 
-        if not found_query and common_nick == chan:
-            w.prnt_date_tags(ptr, 0, tags, message)
-            continue
+def get_self_nick(server):
+    """ return our own nick on a server, cached until it changes or the server disconnects """
+    nick = SELF_NICK.get(server)
+    if not nick:
+        nick = SELF_NICK[server] = w.info_get("irc_nick", server)
+    return nick
 
-        if found_channel:
-            continue
 
-        nicks_il = w.infolist_get("irc_nick", "", server + "," + chan)
-        if not nicks_il:
-            continue
+def message_words(message, count):
+    """ cheaply split a raw IRC message into its source nick followed by up to 'count' words
+    (command, then parameters), skipping any message tags. used instead of irc_message_parse for
+    messages where only the nick and the leading parameters matter. """
+    if message.startswith("@"):
+        message = message.partition(" ")[2]
 
-        while w.infolist_next(nicks_il):
-            search_nick = w.infolist_string(nicks_il, "name")
+    nick = ""
+    if message.startswith(":"):
+        source, _, message = message[1:].partition(" ")
+        nick = source.partition("!")[0]
 
-            if common_nick == search_nick or common_nick == chan:
-                w.prnt_date_tags(ptr, 0, tags, message)
+    return [nick] + message.split(" ", count)[:count]
 
-            if search_nick not in CACHE[server]:
-                CACHE[server][search_nick] = set({chan})
-            else:
-                CACHE[server][search_nick].add(chan)
 
-        w.infolist_free(nicks_il)
+def color_nick(nick):
+    """ colorize a nickname based on what WeeChat picked as it's color. """
+    color = COLOR_CACHE.get(nick)
+    if color is None:
+        color = COLOR_CACHE[nick] = w.color(w.info_get("nick_color_name", nick))
+    return color
+
+
+def sweep_server(server):
+    """ cache the buffers of every joined channel and query on a server, and the other nicks on each
+    channel. after this, the caches are kept up to date from JOIN/PART/KICK/QUIT/NICK and NAMES
+    replies """
+
+    # bound locally, these are called once per channel/nick in the walks below
+    infolist_next = w.infolist_next
+    infolist_string = w.infolist_string
+    infolist_integer = w.infolist_integer
+    infolist_pointer = w.infolist_pointer
+
+    self_nick = get_self_nick(server)
+    chans_il = w.infolist_get("irc_channel", "", server)
+    if chans_il:
+        while infolist_next(chans_il):
+            is_channel = infolist_integer(chans_il, "type") == 0
+            if is_channel and (infolist_integer(chans_il, "part")
+                               or not infolist_integer(chans_il, "nicks_count")):
+                # a channel we parted, or haven't (re)joined yet; JOIN caches it once we're on it
+                continue
+
+            chan = infolist_string(chans_il, "name")
+            set_buffer(server, chan, infolist_pointer(chans_il, "buffer"))
+
+            if not is_channel:
+                continue
+
+            nicks_il = w.infolist_get("irc_nick", "", server + "," + chan)
+            if not nicks_il:
+                continue
+
+            while infolist_next(nicks_il):
+                nick = infolist_string(nicks_il, "name")
+                if nick != self_nick:
+                    cache_nick(server, nick, chan)
+
+            w.infolist_free(nicks_il)
+
+        w.infolist_free(chans_il)
+
+    SWEPT.add(server)
+
+
+def propagate_common_msg(server, common_nick, message):
+    """ propagate a message to all irc buffers in common with a nick on a server """
+
+    if server not in SWEPT:
+        sweep_server(server)
+
+    # bound locally, these are used once per common channel below
+    prnt = w.prnt_date_tags
+    buffers = BUFFERS[server]
+    tags = nick_tags(common_nick)
+
+    for chan in CACHE.get((server, common_nick), ()):
+        ptr = buffers.get(chan)
+        if ptr:
+            prnt(ptr, 0, tags, message)
+
+    ptr = buffers.get(common_nick)
+    if ptr:
+        prnt(ptr, 0, tags, message)
 
 # callbacks
 
@@ -177,164 +324,198 @@ def away_in_cb(data, signal, signal_data):
 
     ircmsg = w.info_get_hashtable(
         "irc_message_parse", {"message": signal_data})
-    server = signal.split(",")[0]
+    server = signal.partition(",")[0]
     nick = ircmsg["nick"]
+    key = (sys.intern(server), sys.intern(nick))
 
     awaymsg = ircmsg["text"]
     if not awaymsg:
 
         dur = ""
-        if nick in KNOWN_AWAY[server]:
-            tdelta = datetime.now() - KNOWN_AWAY[server].pop(nick)[0]
-            days = tdelta.days
-            hours, remainder = divmod(tdelta.seconds, 3600)
+        known = KNOWN_AWAY.pop(key, None)
+        if known is not None:
+            elapsed = int(time.monotonic() - known[0])
+            days, remainder = divmod(elapsed, 86400)
+            hours, remainder = divmod(remainder, 3600)
             minutes, seconds = divmod(remainder, 60)
 
-            if days:
-                dur = "{} day{} ".format(days, "s" if days > 1 else "")
-
-            if hours:
-                dur += "{} hour{} ".format(hours, "s" if hours > 1 else "")
-
-            if minutes:
-                dur += "{} minute{} ".format(minutes, "s" if minutes > 1 else "")
-
-            if seconds:
-                dur += "{} second{}".format(seconds, "s" if seconds > 1 else "")
-
-            dur = dur.rstrip()
+            dur = " ".join("%d %s%s" % (value, unit, "s" if value > 1 else "")
+                           for value, unit in ((days, "day"), (hours, "hour"),
+                                               (minutes, "minute"), (seconds, "second"))
+                           if value)
 
         if dur:
-            msg = MSG_BACK_DURATION.format(pfx=config_get("print_prefix"), cc=color_nick(nick),
-                                           nick=nick, sep=w.color("weechat.color.chat_delimiters"),
-                                           default=w.color("default"), duration=dur,
-                                           cc_away=w.color(config_get("color_away")),
-                                           cc_pfx=w.color(config_get("color_prefix")))
-
+            msg = msg_back_duration(color_nick(nick), nick, dur)
         else:
-            msg = MSG_BACK_NO_DURATION.format(pfx=config_get("print_prefix"), cc=color_nick(nick),
-                                              nick=nick,
-                                              sep=w.color("weechat.color.chat_delimiters"),
-                                              default=w.color("default"),
-                                              cc_away=w.color(config_get("color_away")),
-                                              cc_pfx=w.color(config_get("color_prefix")))
+            msg = msg_back_no_duration(color_nick(nick), nick)
 
         propagate_common_msg(server, nick, msg)
 
     else:
 
-        if nick in KNOWN_AWAY[server] and awaymsg != KNOWN_AWAY[server][nick][1]:
-            msg = MSG_STILL_AWAY.format(pfx=config_get("print_prefix"), cc=color_nick(nick),
-                                        nick=nick, sep=w.color("weechat.color.chat_delimiters"),
-                                        default=w.color("default"), awaymsg=awaymsg,
-                                        cc_away=w.color(config_get("color_away")),
-                                        cc_pfx=w.color(config_get("color_prefix")))
+        known = KNOWN_AWAY.get(key)
+        if known is not None and awaymsg != known[1]:
+            msg = msg_still_away(color_nick(nick), nick, awaymsg)
 
             propagate_common_msg(server, nick, msg)
-            KNOWN_AWAY[server][nick] = (datetime.now(), awaymsg)
-        elif nick not in KNOWN_AWAY[server]:
-            msg = MSG_AWAY.format(pfx=config_get("print_prefix"), cc=color_nick(nick), nick=nick,
-                                  sep=w.color("weechat.color.chat_delimiters"),
-                                  default=w.color("default"), awaymsg=awaymsg,
-                                  cc_away=w.color(config_get("color_away")),
-                                  cc_pfx=w.color(config_get("color_prefix")))
-
-            KNOWN_AWAY[server][nick] = (datetime.now(), awaymsg)
+            KNOWN_AWAY[key] = (time.monotonic(), awaymsg)
+        elif known is None:
+            msg = msg_away(color_nick(nick), nick, awaymsg)
+
+            KNOWN_AWAY[key] = (time.monotonic(), awaymsg)
             propagate_common_msg(server, nick, msg)
 
     return w.WEECHAT_RC_OK
 
 
 def nick_in_cb(data, signal, signal_data):
-    """ callback for a nick change in WeeChat. rename cache entries, except for COLOR """
-    ircmsg = w.info_get_hashtable("irc_message_parse", {"message": signal_data})
-    server = signal.split(",")[0]
+    """ callback for a nick change in WeeChat. rename cache entries and drop the old nick's
+    cached color """
+    server = signal.partition(",")[0]
+    words = message_words(signal_data, 2)
+    if len(words) < 3:
+        return w.WEECHAT_RC_OK
 
-    oldnick = ircmsg["nick"]
-    newnick = ircmsg["text"]
+    oldnick = words[0]
+    newnick = words[2].lstrip(":")
 
-    if oldnick in KNOWN_AWAY[server]:
-        KNOWN_AWAY[server][newnick] = KNOWN_AWAY[server].pop(oldnick)
+    known = KNOWN_AWAY.pop((server, oldnick), None)
+    if known is not None:
+        KNOWN_AWAY[(sys.intern(server), sys.intern(newnick))] = known
 
-    bufname = server + "." + oldnick
-    if bufname in BUFFERS:
-        BUFFERS[server + "." + newnick] = BUFFERS.pop(bufname)
+    COLOR_CACHE.pop(oldnick, None)
+    rename_cached_nick(server, oldnick, newnick)
+
+    if SELF_NICK.get(server) == oldnick:
+        SELF_NICK[server] = newnick
+
+    ptr = BUFFERS[server].get(oldnick)
+    if ptr is not None:
+        forget_buffer(server, oldnick)
+        set_buffer(server, newnick, ptr)
 
     return w.WEECHAT_RC_OK
 
 def part_in_cb(data, signal, signal_data):
     """ callback for a user parting a channel. invalidate cache entries """
-    ircmsg = w.info_get_hashtable("irc_message_parse", {"message": signal_data})
-    server = signal.split(",")[0]
-    channel = ircmsg["channel"]
-    nick = ircmsg["nick"]
+    server = signal.partition(",")[0]
+    words = message_words(signal_data, 2)
+    if len(words) < 3:
+        return w.WEECHAT_RC_OK
 
-    if nick == w.info_get("irc_nick", server):
-        for chans in CACHE[server].values():
-            chans.discard(channel)
-    elif nick in CACHE[server]:
-        CACHE[server][nick].discard(channel)
+    nick = words[0]
+    channel = words[2].lstrip(":")
+
+    if nick == get_self_nick(server):
+        uncache_channel(server, channel)
+        forget_buffer(server, channel)
+    else:
+        uncache_nick_channel(server, nick, channel)
 
     return w.WEECHAT_RC_OK
 
 def quit_in_cb(data, signal, signal_data):
     """ callback for a user quitting an IRC server. invalidate cache entries """
-    ircmsg = w.info_get_hashtable("irc_message_parse", {"message": signal_data})
-    server = signal.split(",")[0]
-    nick = ircmsg["nick"]
+    server = signal.partition(",")[0]
+    nick = message_words(signal_data, 0)[0]
 
-    if nick in CACHE[server]:
-        del CACHE[server][nick]
+    uncache_nick(server, nick)
 
-    bufname = server + "." + nick
-    if bufname in BUFFERS:
-        del BUFFERS[bufname]
+    COLOR_CACHE.pop(nick, None)
+    forget_buffer(server, nick)
 
     return w.WEECHAT_RC_OK
 
 def kick_in_cb(data, signal, signal_data):
     """ callback for a user being kicked from a channel. invalidate cache entries """
-    ircmsg = w.info_get_hashtable("irc_message_parse", {"message": signal_data})
-    server = signal.split(",")[0]
-    channel = ircmsg["channel"]
-    nick = ircmsg["arguments"].split(' ', 2)[1]
+    server = signal.partition(",")[0]
+    words = message_words(signal_data, 3)
+    if len(words) < 4:
+        return w.WEECHAT_RC_OK
 
-    if nick == w.info_get("irc_nick", server):
-        for chans in CACHE[server].values():
-            chans.discard(channel)
+    channel = words[2]
+    nick = words[3].lstrip(":")
 
-        del BUFFERS[server + "." + channel]
-    elif nick in CACHE[server]:
-        CACHE[server][nick].discard(channel)
+    if nick == get_self_nick(server):
+        uncache_channel(server, channel)
+        forget_buffer(server, channel)
+    else:
+        uncache_nick_channel(server, nick, channel)
 
     return w.WEECHAT_RC_OK
 
 def join_in_cb(data, signal, signal_data):
     """ callback for a user joining a channel. add to caches """
-    ircmsg = w.info_get_hashtable("irc_message_parse", {"message": signal_data})
-    server = signal.split(",")[0]
-    nick = ircmsg["nick"]
-    channel = ircmsg["channel"]
-    buffer_name = "{}.{}".format(server, channel)
+    server = signal.partition(",")[0]
+    words = message_words(signal_data, 2)
+    if len(words) < 3:
+        return w.WEECHAT_RC_OK
 
-    if nick in CACHE[server]:
-        CACHE[server][nick].add(channel)
-    else:
-        CACHE[server][nick] = set({channel})
+    nick = words[0]
+    channel = words[2].lstrip(":")
+
+    # our own join only needs the channel's buffer cached, not a CACHE entry for ourselves
+    if nick != get_self_nick(server):
+        cache_nick(server, nick, channel)
 
-    if buffer_name not in BUFFERS:
-        BUFFERS[buffer_name] = w.info_get("irc_buffer", server + "," + channel)
+    if channel not in BUFFERS[server]:
+        set_buffer(server, channel, w.info_get("irc_buffer", server + "," + channel))
 
     return w.WEECHAT_RC_OK
 
 def irc_discon_cb(data, signal, signal_data):
     """ callback for when WeeChat disconnects from IRC. invalidate caches for server """
-    if signal_data in CACHE:
-        del CACHE[signal_data]
+    for nick in SERVER_NICKS.pop(signal_data, ()):
+        for chan in CACHE.pop((signal_data, nick)):
+            CHAN_TO_NICKS.pop((signal_data, chan), None)
 
-    for name in BUFFERS.copy():
-        if name.startswith(signal_data):
-            del BUFFERS[name]
+    SELF_NICK.pop(signal_data, None)
+    SWEPT.discard(signal_data)
+
+    for ptr in BUFFERS.pop(signal_data, {}).values():
+        PTR_TO_KEY.pop(ptr, None)
+
+    return w.WEECHAT_RC_OK
+
+def irc_connected_cb(data, signal, signal_data):
+    """ callback for when WeeChat connects to an IRC server. re-cache any query buffers that
+    survived from the previous session via sweep_server; channels are cached again on JOIN, and
+    JOIN and NAMES replies fill the nick caches from here """
+    sweep_server(signal_data)
+    return w.WEECHAT_RC_OK
+
+def pv_opened_cb(data, signal, signal_data):
+    """ callback for when a query buffer is opened. cache it so away messages reach it """
+    server = w.buffer_get_string(signal_data, "localvar_server")
+    nick = w.buffer_get_string(signal_data, "localvar_channel")
+    if server and nick:
+        set_buffer(server, nick, signal_data)
+
+    return w.WEECHAT_RC_OK
+
+def names_in_cb(data, signal, signal_data):
+    """ callback for a NAMES reply (353). add every listed nick but our own to the cache for the
+    channel """
+    ircmsg = w.info_get_hashtable("irc_message_parse", {"message": signal_data})
+    server = signal.partition(",")[0]
+
+    # arguments: "<me> <type> <channel> :<nick> <nick> ..."
+    args = ircmsg["arguments"].split(" ", 3)
+    if len(args) < 4:
+        return w.WEECHAT_RC_OK
+
+    channel = args[2]
+    if channel not in BUFFERS[server]:
+        # a /names for a channel we aren't on (channel buffers are only cached while joined)
+        return w.WEECHAT_RC_OK
+
+    self_nick = get_self_nick(server)
+    prefixes = w.info_get("irc_server_isupport_value", server + ",PREFIX").partition(")")[2]
+    for name in args[3].lstrip(":").split():
+        # strip (multi-prefix) modes and any userhost-in-names host
+        nick = name.lstrip(prefixes or "~&@%+").partition("!")[0]
+        if nick != self_nick:
+            cache_nick(server, nick, channel)
 
     return w.WEECHAT_RC_OK
 
@@ -342,11 +523,20 @@ def buffer_closed_cb(data, signal, signal_data):
     """ callback for when a buffer closes. used to invalidate query windows so we don't try to print
     to a closed query buffer.  """
 
-    for name, ptr in BUFFERS.items():
-        if ptr == signal_data:
-            del BUFFERS[name]
-            break
+    key = PTR_TO_KEY.get(signal_data)
+    if key:
+        forget_buffer(*key)
+
+    return w.WEECHAT_RC_OK
+
+def settings_changed_cb(data, option, value):
+    """ callback for when a setting used in away messages changes. re-render them """
+    render_settings()
+    return w.WEECHAT_RC_OK
 
+def nick_colors_changed_cb(data, option, value):
+    """ callback for when WeeChat's nick color options change. drop cached nick colors """
+    COLOR_CACHE.clear()
     return w.WEECHAT_RC_OK
 
 w.hook_signal("*,irc_in2_AWAY", "away_in_cb", "")
@@ -355,6 +545,14 @@ w.hook_signal("*,irc_in2_PART", "part_in_cb", "")
 w.hook_signal("*,irc_in2_QUIT", "quit_in_cb", "")
 w.hook_signal("*,irc_in2_KICK", "kick_in_cb", "")
 w.hook_signal("*,irc_in2_JOIN", "join_in_cb", "")
+w.hook_signal("*,irc_in2_353", "names_in_cb", "")
+w.hook_signal("irc_server_connected", "irc_connected_cb", "")
+w.hook_signal("irc_pv_opened", "pv_opened_cb", "")
 w.hook_signal("irc_server_disconnected", "irc_discon_cb", "")
 w.hook_signal("buffer_closed", "buffer_closed_cb", "")
+w.hook_config("weechat.color.chat_nick_colors", "nick_colors_changed_cb", "")
+w.hook_config("weechat.look.nick_color_*", "nick_colors_changed_cb", "")
+w.hook_config("plugins.var.python." + SCRIPT_NAME + ".*", "settings_changed_cb", "")
+w.hook_config("weechat.color.chat_delimiters", "settings_changed_cb", "")
 config_set_defaults()
+render_settings()
@@ -35,7 +35,7 @@ except ImportError:
     print("Load this script from WeeChat.")
     sys.exit()
 
-from typing import Callable, Dict, Tuple # pylint: disable=unused-import
+from typing import Callable, Dict, List, Tuple # pylint: disable=unused-import
 
 SCRIPT_NAME = "dev"
 SCRIPT_AUTHOR = "Samuel Hoffman <sam@gentoo.party>"
@@ -46,20 +46,22 @@ SCRIPT_DESC = "Developer helper stuff."
 w.register(SCRIPT_NAME, SCRIPT_AUTHOR, SCRIPT_VERSION,
            SCRIPT_LICENSE, SCRIPT_DESC, "", "")
 
-EVENTS = {} # type: Dict[str, Callable]
-SIG = {} # type: Dict[str, int]
+# infolist field type -> (getter, color, formatter) for /infolist iter
+FIELD_GETTERS = {
+    "i": (w.infolist_integer, w.color("*lightgreen"), str),
+    "s": (w.infolist_string, w.color("*214"), repr),
+    "p": (w.infolist_pointer, w.color("*yellow"), str),
+    "t": (w.infolist_time, w.color("magenta"), str),
+} # type: Dict[str, Tuple[Callable, str, Callable]]
+
+EVENTS = {} # type: Dict[str, Tuple[Callable, int]]
 
 def hook(command: str, nargs: int) -> Callable:
     """ decorator for hooking a function to a sub command """
-    global EVENTS, SIG
     def ev_dec(func):
         """ the actual decorator """
-        EVENTS[command] = func
-        SIG[command] = nargs
-        def wrapper(*args, **kwargs):
-            """ wrapped function """
-            return func(*args, **kwargs)
-        return wrapper
+        EVENTS[command] = (func, nargs)
+        return func
     return ev_dec
 
 def dev_cmd_cb(data, buf, args):
@@ -69,15 +71,17 @@ def dev_cmd_cb(data, buf, args):
     if len(args) > 1:
         command = args.pop(0).lower()
 
-        if command in EVENTS:
-            if len(args) < SIG[command]:
+        entry = EVENTS.get(command)
+        if entry is not None:
+            func, nargs = entry
+            if len(args) < nargs:
                 w.prnt('', f"not enough arguments for {command}")
                 return w.WEECHAT_RC_ERROR
-            elif len(args) > SIG[command]:
+            elif len(args) > nargs:
                 w.prnt('', f"too many arguments for {command}")
                 return w.WEECHAT_RC_ERROR
 
-            EVENTS[command](*args)
+            func(*args)
             return w.WEECHAT_RC_OK
 
     return w.WEECHAT_RC_OK
@@ -163,37 +167,41 @@ def dev_iter(ptr):
 
     infos = [] # type: List[Dict[str, Tuple]]
 
+    # items of the same infolist almost always share their fields, so only re-parse them when the
+    # fields string actually changes
+    fields_str = None
+    fields = [] # type: List[Tuple[str, str]]
+
     while w.infolist_next(ptr):
 
+        current = w.infolist_fields(ptr)
+        if current != fields_str:
+            fields_str = current
+            fields = [tuple(field.split(":", 1)) for field in fields_str.split(",")]
+
         this = {}
-        for field in w.infolist_fields(ptr).split(","):
-            ftype, name = field.split(":", 1)
-            if ftype == "i":
-                this[name] = ftype, f"{w.color('*lightgreen') + str(w.infolist_integer(ptr, name))}"
-            elif ftype == "s":
-                this[name] = ftype, w.color('*214') + f"{w.infolist_string(ptr, name)!r}"
-            elif ftype == "p":
-                this[name] = ftype, f"{w.color('*yellow') + w.infolist_pointer(ptr, name)}"
-            elif ftype == "t":
-                this[name] = ftype, f"{w.color('magenta') + w.infolist_time(ptr, name)}"
+        for ftype, name in fields:
+            if ftype in FIELD_GETTERS:
+                getter, color, fmt = FIELD_GETTERS[ftype]
+                this[name] = ftype, color + fmt(getter(ptr, name))
             else:
-                this[name] = "(not available in scripting API)"
+                this[name] = ftype, "(not available in scripting API)"
 
         infos.append(this)
 
-    for item in infos:
+    pad = max((len(name) for item in infos for name in item), default=0)
 
-        pad = 0
-        for key in item:
-            if len(key) > pad:
-                pad = len(key)
+    prnt = w.prnt
+    blue, reset, red = w.color('blue'), w.color('reset'), w.color('red')
 
-        for name, (ftype, value) in item.items():
+    for item in infos:
 
-            w.prnt(buf, w.color('blue') + f"{name: <{pad}}" + w.color('reset') +
-                   f" = ({ftype}) {value}")
+        # one print per item; WeeChat splits the message into separate lines on newlines
+        lines = [blue + f"{name: <{pad}}" + reset + f" = ({ftype}) {value}"
+                 for name, (ftype, value) in item.items()]
+        lines.append(f"{red}---")
 
-        w.prnt(buf, f"{w.color('red')}---")
+        prnt(buf, "\n".join(lines))
 
 
     w.buffer_set(buf, "title", f"infolist {ptr}, iterated {len(infos)} item(s)")
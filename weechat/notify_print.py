@@ -24,6 +24,10 @@
 notify_print.py: print /notify signals to relevant IRC buffers
 """
 
+# pylint: disable=W0603
+
+import sys
+
 try:
     from typing import Dict, Set  # pylint: disable=unused-import
 except ImportError:
@@ -52,26 +56,37 @@ COMMON = set()  # type: Set[str]
 
 def get_notify_list(*args, **kwargs):
     """ load the current notify list """
+    global COMMON
+
     infolist = w.infolist_get("irc_notify", "", "")
 
     if not infolist:
-        return
+        return w.WEECHAT_RC_OK
 
-    COMMON.clear()
+    common = set()  # type: Set[str]
     while w.infolist_next(infolist):
         nick = w.infolist_string(infolist, "nick")
         server = w.infolist_string(infolist, "server_name")
 
-        COMMON.add(server + "." + nick)
+        common.add(sys.intern(server + "." + nick))
 
     w.infolist_free(infolist)
 
+    # swap in the new set in one step rather than clearing and refilling the one that
+    # hide_buffer_quit_join reads from
+    COMMON = common
+
     return w.WEECHAT_RC_OK
 
 
 def hide_buffer_quit_join(data, modifier, modifier_data, string):
     """ callback for modifying printed data. used to hide irc_quit/irc_nick_back messages in query
     buffers with notify list users """
+    # this runs for every line printed anywhere, so bail out before touching modifier_data when
+    # there is nobody on the notify list
+    if not COMMON:
+        return string
+
     try:
         plugin, name, tags = modifier_data.split(";", 2)
     except ValueError:
@@ -80,10 +95,7 @@ def hide_buffer_quit_join(data, modifier, modifier_data, string):
     if name not in COMMON:
         return string
 
-    if "irc_nick_back" in tags:
-        return ""
-
-    elif "irc_quit" in tags:
+    if "irc_nick_back" in tags or "irc_quit" in tags:
         return ""
 
     return string
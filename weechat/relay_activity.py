@@ -25,7 +25,7 @@ relay_activity.py: clear activity on buffers when an irc relay sends a message t
 `/buffer switch`-ing to it.
 """
 
-import re
+from functools import lru_cache
 from typing import Dict
 
 import weechat as w
@@ -42,11 +42,34 @@ SCRIPT_DESC = "clear activity on a buffer when an IRC relay sends a message to i
 w.register(SCRIPT_NAME, SCRIPT_AUTHOR, SCRIPT_VERSION,
            SCRIPT_LICENSE, SCRIPT_DESC, "", "")
 
-RELAY_REGEX = re.compile(r"^[0-9]+\/"
-                         r"(?:ipv4\.)?(?:ipv6\.)?(?:ssl\.)?"
-                         r"(?P<protocol>irc|weechat)\.?(?P<name>[^ ]+)?\/.+$")
+RELAY_DESC_PREFIXES = ("ipv4.", "ipv6.", "ssl.")
 
 IRC_RELAYS = 0
+OUT_HOOK = None
+
+
+@lru_cache(maxsize=256)
+def parse_relay_desc(desc: str) -> Dict[str, str]:
+    """ parse the protocol and server name out of a relay client's description, in the form
+    "<id>/[ipv4.][ipv6.][ssl.]<protocol>[.<name>]/<address>". returns an empty dict if it isn't an
+    irc or weechat relay. the result is cached per description, so callers must not modify it """
+    try:
+        client_id, proto, address = desc.split("/", 2)
+    except ValueError:
+        return {}
+
+    if not client_id.isdigit() or not address:
+        return {}
+
+    for prefix in RELAY_DESC_PREFIXES:
+        if proto.startswith(prefix):
+            proto = proto[len(prefix):]
+
+    protocol, _, name = proto.partition(".")
+    if protocol not in ("irc", "weechat"):
+        return {}
+
+    return {"protocol": protocol, "name": name or None}
 
 
 def relay_get_server(relay_ptr: str) -> Dict[str, str]:
@@ -54,22 +77,32 @@ def relay_get_server(relay_ptr: str) -> Dict[str, str]:
     infolist = w.infolist_get("relay", relay_ptr, "")
     server = {}  # type: Dict[str, str]
     if infolist and w.infolist_next(infolist):
-        match = RELAY_REGEX.search(w.infolist_string(infolist, "desc"))
-        if match:
-            server = match.groupdict()
+        server = parse_relay_desc(w.infolist_string(infolist, "desc"))
 
         w.infolist_free(infolist)
     return server
 
 
+def update_out_hook() -> None:
+    """ only hook outgoing PRIVMSGs while there are irc relays connected """
+    global OUT_HOOK
+
+    if IRC_RELAYS > 0 and not OUT_HOOK:
+        OUT_HOOK = w.hook_signal("*,irc_out_privmsg", "out_privmsg_cb", "")
+    elif IRC_RELAYS <= 0 and OUT_HOOK:
+        w.unhook(OUT_HOOK)
+        OUT_HOOK = None
+
+
 def relay_authed_cb(data: str, signal: str, signal_data: str) -> int:
     """ callback for when a relay has connected + authenticated to weechat """
     global IRC_RELAYS
 
     server = relay_get_server(signal_data)
 
-    if server["protocol"] == "irc":
+    if server.get("protocol") == "irc":
         IRC_RELAYS += 1
+        update_out_hook()
 
     return w.WEECHAT_RC_OK
 
@@ -80,33 +113,28 @@ def relay_discon(data: str, signal: str, signal_data: str) -> int: # pylint: dis
 
     server = relay_get_server(signal_data)
 
-    if server["protocol"] == "irc":
+    if server.get("protocol") == "irc":
         IRC_RELAYS -= 1
+        update_out_hook()
 
     return w.WEECHAT_RC_OK
 
 
 def out_privmsg_cb(data: str, signal: str, signal_data: str) -> int:
-    """ callback for when weechat sends data to a server """
-    if IRC_RELAYS:
-
-        server = signal.split(",")[0]
-        ircmsg = w.info_get_hashtable(
-            "irc_message_parse", {"message": signal_data})
-
-        buf = w.info_get("irc_buffer", "{},{}".format(
-            server, ircmsg["channel"]))
-        if not buf:
-            return w.WEECHAT_RC_OK
+    """ callback for when weechat sends data to a server. only hooked while there are irc relays
+    connected, see update_out_hook() """
+    server = signal.partition(",")[0]
+    ircmsg = w.info_get_hashtable(
+        "irc_message_parse", {"message": signal_data})
 
-        name = ""
-        infolist = w.infolist_get("buffer", buf, "")
-        if infolist and w.infolist_next(infolist):
-            name = w.infolist_string(infolist, "name")
-            w.infolist_free(infolist)
+    buf = w.info_get("irc_buffer", "{},{}".format(
+        server, ircmsg["channel"]))
+    if not buf:
+        return w.WEECHAT_RC_OK
 
-        if name:
-            w.command(buf, "/buffer " + name)
+    name = w.buffer_get_string(buf, "name")
+    if name:
+        w.command(buf, "/buffer " + name)
 
     return w.WEECHAT_RC_OK
 
@@ -118,14 +146,12 @@ def relays_connected() -> None:
     infolist = w.infolist_get("relay", '', '')
     if infolist:
         while w.infolist_next(infolist):
-            match = RELAY_REGEX.search(w.infolist_string(infolist, "desc"))
-            if match:
-                if match.group("protocol") == "irc":
-                    IRC_RELAYS += 1
+            if parse_relay_desc(w.infolist_string(infolist, "desc")).get("protocol") == "irc":
+                IRC_RELAYS += 1
         w.infolist_free(infolist)
 
 
 w.hook_signal("relay_client_auth_ok", "relay_authed_cb", "")
 w.hook_signal("relay_client_disconnected", "relay_discon", "")
-w.hook_signal("*,irc_out_privmsg", "out_privmsg_cb", "")
 relays_connected()
+update_out_hook()